@@ -0,0 +1,127 @@
+"""Núcleo compartilhado pelos scripts de benchmark do protocolo RUDP."""
+from __future__ import annotations
+import sys
+import os
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rudp.server import RUDPServer
+from rudp.client import RUDPClient
+
+# orjson (opcional) serializa em C direto para bytes; senão usa json da stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Sem GIL (ex.: python3.13t) os cenários rodam em paralelo, cada um com seu
+# servidor e porta; com GIL rodam em sequência para não distorcer as medidas.
+FREE_THREADED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+# Event loop único (em uma thread de fundo) que hospeda os servidores de todos os cenários
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _server_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+    return _loop
+
+
+def start_server(port: int, drop: float) -> RUDPServer:
+    """Registra um servidor no event loop compartilhado e aguarda o socket estar pronto."""
+    server = RUDPServer("127.0.0.1", port, drop)
+    loop = _server_loop()
+    asyncio.run_coroutine_threadsafe(server.run_asyncio(loop), loop).result(timeout=2.0)
+    return server
+
+
+def run_all(fn, scenarios: list) -> list:
+    """Aplica fn a cada cenário, em paralelo apenas se não houver GIL."""
+    if FREE_THREADED:
+        with ThreadPoolExecutor(max_workers=len(scenarios)) as pool:
+            return list(pool.map(fn, scenarios))
+    return [fn(sc) for sc in scenarios]
+
+
+def run_scenario(name: str, data: bytes | memoryview, drop: float, crypto: bool, port: int,
+                 cc_enabled: bool = True, timeout: float = 0.5) -> dict:
+    """Executa um cenário e retorna o dicionário de resultado."""
+    print(f"\nTestando: {name}...")
+    start_server(port, drop)
+
+    result = {
+        "scenario": name,
+        "packets_sent": 0,
+        "throughput_kbps": 0,
+        "retransmissions": 0,
+        "time_ms": 0,
+        "drop_rate": drop,
+        "crypto": crypto,
+        "cc_enabled": cc_enabled,
+        "data_mb": len(data) / 1024 / 1024,
+    }
+    c = RUDPClient("127.0.0.1", port, timeout, use_crypto=crypto, cc_enabled=cc_enabled, batch_size=64)
+    if not c.connect():
+        print(f"  FALHA na conexao: {name}")
+        return result
+
+    stats = c.send_data(data)
+    c.close()
+    result.update(
+        packets_sent=stats.packets_sent,
+        throughput_kbps=stats.throughput_kbps,
+        retransmissions=stats.retransmissions,
+        time_ms=stats.time_ms,
+    )
+    print(f"  OK: {name}: {stats.packets_sent} pkts, {stats.throughput_kbps:.1f} KB/s, {stats.retransmissions} retx")
+    return result
+
+
+def run_scenarios(scenarios: list[tuple], data_size: int, out_path: Path,
+                  timeout: float = 0.5) -> list[dict]:
+    """Executa os cenários (nome, drop_rate, use_crypto, port, cc_enabled) e salva em out_path."""
+    # Dados sintéticos gerados uma única vez e reaproveitados por todos os cenários
+    data = memoryview(os.urandom(data_size))
+
+    def run(scenario: tuple) -> dict:
+        name, *params = scenario
+        return run_scenario(name, data, *params, timeout=timeout)
+
+    results = run_all(run, scenarios)
+    save_results(results, out_path)
+    return results
+
+
+def save_results(results: list[dict], out_path: Path) -> None:
+    """Salva os resultados em JSON indentado."""
+    out_path.parent.mkdir(exist_ok=True, parents=True)
+    if orjson is not None:
+        out_path.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+        return
+    with open(out_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def print_table(results: list[dict], title: str) -> None:
+    """Imprime a tabela resumo dos resultados."""
+    print("\n" + "=" * 80)
+    print(title)
+    print("=" * 80)
+    print(f"{'Cenário':<35} {'Pacotes':>8} {'Vazão (KB/s)':>12} {'Retx':>6} {'Tempo (s)':>10}")
+    print("-" * 80)
+    for r in results:
+        print(f"{r['scenario']:<35} {r['packets_sent']:>8} {r['throughput_kbps']:>12.1f} {r['retransmissions']:>6} {r['time_ms']/1000:>10.1f}")
+    print("=" * 80)
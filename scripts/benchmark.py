@@ -1,24 +1,25 @@
 """Script de benchmark para avaliação do protocolo RUDP."""
 from __future__ import annotations
 import os
-import sys
-import json
-import time
 import logging
-import threading
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
-# Adicionar src ao path
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
-from rudp.server import RUDPServer
+# _bench_core adiciona src ao path
+from _bench_core import run_all, save_results, start_server
 from rudp.client import RUDPClient
 
 logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
 log = logging.getLogger("benchmark")
 log.setLevel(logging.INFO)
 
+# Tamanho para >= 10.000 pacotes (cada pacote = 1024 bytes)
+# 10.000 * 1024 = 10.240.000 bytes ≈ 10MB
+DATA_SIZE = 10 * 1024 * 1024  # 10MB = ~10.000 pacotes
+
+# Dados sintéticos gerados uma única vez e reaproveitados por todos os cenários
+DATA = os.urandom(DATA_SIZE)
+
 
 @dataclass
 class BenchmarkResult:
@@ -41,26 +42,28 @@ def run_scenario(
     use_crypto: bool = True,
     port: int = 9100,
     timeout: float = 0.5,
+    batch_size: int = 64,
+    sock_buf_size: int = 12 * 1024 * 1024,
+    data: bytes | memoryview | None = None,
 ) -> BenchmarkResult:
     """Executa um cenário de benchmark."""
     log.info(f"=== {name} ===")
     log.info(f"  Data: {data_size} bytes, Drop: {drop_rate*100:.0f}%, Crypto: {use_crypto}")
     
-    # Iniciar servidor em thread
-    server = RUDPServer("127.0.0.1", port, drop_prob=drop_rate)
-    server_thread = threading.Thread(target=server.run, daemon=True)
-    server_thread.start()
-    time.sleep(0.3)  # Aguardar servidor iniciar
+    # Iniciar servidor em thread e aguardar o socket estar pronto
+    start_server(port, drop_rate)
     
     # Cliente
-    client = RUDPClient("127.0.0.1", port, timeout_s=timeout, use_crypto=use_crypto)
+    client = RUDPClient("127.0.0.1", port, timeout_s=timeout, use_crypto=use_crypto,
+                        batch_size=batch_size, sock_buf_size=sock_buf_size)
     
     if not client.connect():
         log.error("Falha ao conectar")
         return None
     
-    # Gerar dados sintéticos
-    data = os.urandom(data_size)
+    # Dados sintéticos: por padrão, fatia (sem cópia) do buffer compartilhado
+    if data is None:
+        data = memoryview(DATA)[:data_size] if data_size <= len(DATA) else os.urandom(data_size)
     
     # Enviar e coletar métricas
     stats = client.send_data(data)
@@ -84,46 +87,31 @@ def run_scenario(
 
 def main():
     """Executa todos os cenários de benchmark."""
-    results = []
-    
-    # Tamanho para >= 10.000 pacotes (cada pacote = 1024 bytes)
-    # 10.000 * 1024 = 10.240.000 bytes ≈ 10MB
-    DATA_SIZE = 10 * 1024 * 1024  # 10MB = ~10.000 pacotes
-    
-    port = 9100
-    
-    # Cenário 1: Sem perdas, com crypto
-    r = run_scenario("Sem perdas + Crypto", DATA_SIZE, drop_rate=0.0, use_crypto=True, port=port)
-    if r: results.append(r)
-    port += 1
-    
-    # Cenário 2: Sem perdas, sem crypto
-    r = run_scenario("Sem perdas + Sem Crypto", DATA_SIZE, drop_rate=0.0, use_crypto=False, port=port)
-    if r: results.append(r)
-    port += 1
-    
-    # Cenário 3: Com 5% perdas, com crypto
-    r = run_scenario("5% perdas + Crypto", DATA_SIZE, drop_rate=0.05, use_crypto=True, port=port, timeout=0.3)
-    if r: results.append(r)
-    port += 1
-    
-    # Cenário 4: Com 10% perdas, com crypto
-    r = run_scenario("10% perdas + Crypto", DATA_SIZE, drop_rate=0.10, use_crypto=True, port=port, timeout=0.3)
-    if r: results.append(r)
-    port += 1
-    
-    # Cenário 5: Com 5% perdas, sem crypto
-    r = run_scenario("5% perdas + Sem Crypto", DATA_SIZE, drop_rate=0.05, use_crypto=False, port=port, timeout=0.3)
-    if r: results.append(r)
-    port += 1
+    scenarios = [
+        # Cenário 1: Sem perdas, com crypto
+        dict(name="Sem perdas + Crypto", drop_rate=0.0, use_crypto=True),
+        # Cenário 2: Sem perdas, sem crypto
+        dict(name="Sem perdas + Sem Crypto", drop_rate=0.0, use_crypto=False),
+        # Cenário 3: Com 5% perdas, com crypto
+        dict(name="5% perdas + Crypto", drop_rate=0.05, use_crypto=True, timeout=0.3),
+        # Cenário 4: Com 10% perdas, com crypto
+        dict(name="10% perdas + Crypto", drop_rate=0.10, use_crypto=True, timeout=0.3),
+        # Cenário 5: Com 5% perdas, sem crypto
+        dict(name="5% perdas + Sem Crypto", drop_rate=0.05, use_crypto=False, timeout=0.3),
+    ]
+    # Cada cenário usa uma porta (e um par servidor/cliente) próprio
+    for port, kwargs in enumerate(scenarios, start=9100):
+        kwargs["port"] = port
+    
+    results = run_all(lambda kw: run_scenario(data_size=DATA_SIZE, **kw), scenarios)
+    results = [r for r in results if r]
     
     # Salvar resultados
     output_dir = Path(__file__).parent / "results"
     output_dir.mkdir(exist_ok=True)
     
     results_file = output_dir / "benchmark_results.json"
-    with open(results_file, "w") as f:
-        json.dump([asdict(r) for r in results], f, indent=2)
+    save_results([asdict(r) for r in results], results_file)
     log.info(f"Resultados salvos em {results_file}")
     
     # Imprimir tabela resumo
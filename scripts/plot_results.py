@@ -3,8 +3,9 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-# Tentar importar matplotlib
+# Tentar importar matplotlib (numpy é dependência dele)
 try:
+    import numpy as np
     import matplotlib.pyplot as plt
     import matplotlib
     matplotlib.use('Agg')  # Backend não-interativo
@@ -19,92 +20,96 @@ def load_results(results_file: Path) -> list[dict]:
         return json.load(f)
 
 
-def plot_throughput_comparison(results: list[dict], output_dir: Path):
+def to_array(results: list[dict]) -> np.recarray:
+    """Converte os resultados em um array estruturado (uma linha por cenário)."""
+    dtype = [
+        ("scenario", object),
+        ("drop_rate", "f8"),
+        ("cc_enabled", "?"),
+        ("crypto", "?"),
+        ("throughput_kbps", "f8"),
+        ("retransmissions", "i8"),
+    ]
+    rows = [
+        (r["scenario"], r["drop_rate"], r.get("cc_enabled", True), r.get("crypto", False),
+         r["throughput_kbps"], r["retransmissions"])
+        for r in results
+    ]
+    return np.rec.array(np.array(rows, dtype=dtype))
+
+
+def _cc_colors(arr: np.recarray) -> np.ndarray:
+    """Cores: verde para CC on, vermelho para CC off."""
+    return np.where(arr.cc_enabled, '#2ecc71', '#e74c3c')
+
+
+def plot_throughput_comparison(arr: np.recarray, output_dir: Path):
     """Gera gráfico de comparação de vazão."""
-    scenarios = [r["scenario"] for r in results]
-    throughputs = [r["throughput_kbps"] for r in results]
-    
-    # Cores: verde para CC on, vermelho para CC off
-    colors = []
-    for r in results:
-        if r.get("cc_enabled", True):
-            colors.append('#2ecc71')  # Verde
-        else:
-            colors.append('#e74c3c')  # Vermelho
+    scenarios = arr.scenario
+    throughputs = arr.throughput_kbps
+    colors = _cc_colors(arr)
     
     fig, ax = plt.subplots(figsize=(12, 6))
-    bars = ax.bar(scenarios, throughputs, color=colors)
+    bars = ax.bar(scenarios, throughputs, color=colors, rasterized=True)
     
     ax.set_ylabel('Vazão (KB/s)', fontsize=12)
     ax.set_xlabel('Cenário', fontsize=12)
     ax.set_title('Comparação de Vazão por Cenário (Verde=CC on, Vermelho=CC off)', fontsize=14, fontweight='bold')
     
     # Adicionar valores nas barras
-    for bar, val in zip(bars, throughputs):
-        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5, 
-                f'{val:.1f}', ha='center', va='bottom', fontsize=9)
+    ax.bar_label(bars, fmt='{:.1f}'.format, padding=3, fontsize=9)
     
     plt.xticks(rotation=25, ha='right')
     plt.tight_layout()
-    plt.savefig(output_dir / 'throughput_comparison.png', dpi=150)
+    plt.savefig(output_dir / 'throughput_comparison.png', dpi=100)
     plt.close()
     print(f"Gráfico salvo: {output_dir / 'throughput_comparison.png'}")
 
 
-def plot_retransmissions(results: list[dict], output_dir: Path):
+def plot_retransmissions(arr: np.recarray, output_dir: Path):
     """Gera gráfico de retransmissões por cenário."""
-    scenarios = [r["scenario"] for r in results]
-    retx = [r["retransmissions"] for r in results]
-    
-    # Cores: verde para CC on, vermelho para CC off
-    colors = []
-    for r in results:
-        if r.get("cc_enabled", True):
-            colors.append('#2ecc71')
-        else:
-            colors.append('#e74c3c')
+    scenarios = arr.scenario
+    retx = arr.retransmissions
+    colors = _cc_colors(arr)
     
     fig, ax = plt.subplots(figsize=(12, 6))
-    bars = ax.bar(scenarios, retx, color=colors)
+    bars = ax.bar(scenarios, retx, color=colors, rasterized=True)
     
     ax.set_ylabel('Retransmissões', fontsize=12)
     ax.set_xlabel('Cenário', fontsize=12)
     ax.set_title('Retransmissões por Cenário (Verde=CC on, Vermelho=CC off)', fontsize=14, fontweight='bold')
     
-    for bar, val in zip(bars, retx):
-        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-                f'{val}', ha='center', va='bottom', fontsize=9)
+    ax.bar_label(bars, fmt='{:.0f}'.format, padding=3, fontsize=9)
     
     plt.xticks(rotation=25, ha='right')
     plt.tight_layout()
-    plt.savefig(output_dir / 'retransmissions.png', dpi=150)
+    plt.savefig(output_dir / 'retransmissions.png', dpi=100)
     plt.close()
     print(f"Gráfico salvo: {output_dir / 'retransmissions.png'}")
 
 
-def plot_cc_comparison(results: list[dict], output_dir: Path):
+def _first_by_rate(arr: np.recarray, loss_rates: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Vazão do primeiro cenário selecionado por mask para cada taxa de perda (0 se ausente)."""
+    match = (arr.drop_rate[None, :] == loss_rates[:, None]) & mask[None, :]
+    first = match.argmax(axis=1)
+    return np.where(match.any(axis=1), arr.throughput_kbps[first], 0)
+
+
+def plot_cc_comparison(arr: np.recarray, output_dir: Path):
     """Gera gráfico de comparação CC on vs CC off lado a lado."""
     # Agrupar por taxa de perda
-    loss_rates = [0.0, 0.05, 0.10]
+    loss_rates = np.array([0.0, 0.05, 0.10])
     labels = ['0% perdas', '5% perdas', '10% perdas']
     
-    cc_on_throughput = []
-    cc_off_throughput = []
-    
-    for rate in loss_rates:
-        # Encontrar resultado CC on
-        on_result = next((r for r in results if r["drop_rate"] == rate and r.get("cc_enabled", True) and not r.get("crypto", False)), None)
-        off_result = next((r for r in results if r["drop_rate"] == rate and not r.get("cc_enabled", True)), None)
-        
-        cc_on_throughput.append(on_result["throughput_kbps"] if on_result else 0)
-        cc_off_throughput.append(off_result["throughput_kbps"] if off_result else 0)
+    cc_on_throughput = _first_by_rate(arr, loss_rates, arr.cc_enabled & ~arr.crypto)
+    cc_off_throughput = _first_by_rate(arr, loss_rates, ~arr.cc_enabled)
     
-    x = range(len(labels))
+    x = np.arange(len(labels))
     width = 0.35
     
     fig, ax = plt.subplots(figsize=(10, 6))
-    bars1 = ax.bar([i - width/2 for i in x], cc_on_throughput, width, label='CC ON', color='#2ecc71')
-    bars2 = ax.bar([i + width/2 for i in x], cc_off_throughput, width, label='CC OFF', color='#e74c3c')
+    bars1 = ax.bar(x - width/2, cc_on_throughput, width, label='CC ON', color='#2ecc71', rasterized=True)
+    bars2 = ax.bar(x + width/2, cc_off_throughput, width, label='CC OFF', color='#e74c3c', rasterized=True)
     
     ax.set_ylabel('Vazão (KB/s)', fontsize=12)
     ax.set_xlabel('Taxa de Perda', fontsize=12)
@@ -114,40 +119,32 @@ def plot_cc_comparison(results: list[dict], output_dir: Path):
     ax.legend()
     
     # Adicionar valores nas barras
-    for bar in bars1:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2, height + 1, f'{height:.1f}', ha='center', va='bottom', fontsize=10)
-    for bar in bars2:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2, height + 1, f'{height:.1f}', ha='center', va='bottom', fontsize=10)
+    for bars in (bars1, bars2):
+        ax.bar_label(bars, fmt='{:.1f}'.format, padding=1, fontsize=10)
     
     plt.tight_layout()
-    plt.savefig(output_dir / 'cc_comparison.png', dpi=150)
+    plt.savefig(output_dir / 'cc_comparison.png', dpi=100)
     plt.close()
     print(f"Gráfico salvo: {output_dir / 'cc_comparison.png'}")
 
 
-def plot_loss_vs_throughput(results: list[dict], output_dir: Path):
+def plot_loss_vs_throughput(arr: np.recarray, output_dir: Path):
     """Gera gráfico de vazão vs taxa de perda para CC on e CC off."""
     # Filtrar resultados sem crypto
-    cc_on = [r for r in results if r.get("cc_enabled", True) and not r.get("crypto", False)]
-    cc_off = [r for r in results if not r.get("cc_enabled", True)]
+    cc_on = arr[arr.cc_enabled & ~arr.crypto]
+    cc_off = arr[~arr.cc_enabled]
     
     # Ordenar por drop_rate
-    cc_on = sorted(cc_on, key=lambda x: x["drop_rate"])
-    cc_off = sorted(cc_off, key=lambda x: x["drop_rate"])
+    cc_on = cc_on[np.argsort(cc_on.drop_rate, kind='stable')]
+    cc_off = cc_off[np.argsort(cc_off.drop_rate, kind='stable')]
     
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    if cc_on:
-        drop_rates_on = [r["drop_rate"] * 100 for r in cc_on]
-        throughputs_on = [r["throughput_kbps"] for r in cc_on]
-        ax.plot(drop_rates_on, throughputs_on, 'o-', markersize=10, linewidth=2, color='#2ecc71', label='CC ON')
+    if len(cc_on):
+        ax.plot(cc_on.drop_rate * 100, cc_on.throughput_kbps, 'o-', markersize=10, linewidth=2, color='#2ecc71', label='CC ON')
     
-    if cc_off:
-        drop_rates_off = [r["drop_rate"] * 100 for r in cc_off]
-        throughputs_off = [r["throughput_kbps"] for r in cc_off]
-        ax.plot(drop_rates_off, throughputs_off, 's--', markersize=10, linewidth=2, color='#e74c3c', label='CC OFF')
+    if len(cc_off):
+        ax.plot(cc_off.drop_rate * 100, cc_off.throughput_kbps, 's--', markersize=10, linewidth=2, color='#e74c3c', label='CC OFF')
     
     ax.set_ylabel('Vazão (KB/s)', fontsize=12)
     ax.set_xlabel('Taxa de Perda (%)', fontsize=12)
@@ -156,7 +153,7 @@ def plot_loss_vs_throughput(results: list[dict], output_dir: Path):
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(output_dir / 'loss_vs_throughput.png', dpi=150)
+    plt.savefig(output_dir / 'loss_vs_throughput.png', dpi=100)
     plt.close()
     print(f"Gráfico salvo: {output_dir / 'loss_vs_throughput.png'}")
 
@@ -208,12 +205,13 @@ def main():
     
     results = load_results(results_file)
     print(f"Carregados {len(results)} resultados de {results_file.name}")
+    arr = to_array(results)
     
     # Gerar gráficos
-    plot_throughput_comparison(results, results_dir)
-    plot_retransmissions(results, results_dir)
-    plot_cc_comparison(results, results_dir)
-    plot_loss_vs_throughput(results, results_dir)
+    plot_throughput_comparison(arr, results_dir)
+    plot_retransmissions(arr, results_dir)
+    plot_cc_comparison(arr, results_dir)
+    plot_loss_vs_throughput(arr, results_dir)
     
     # Gerar tabela LaTeX
     generate_latex_table(results, results_dir)
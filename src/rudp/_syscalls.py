@@ -0,0 +1,156 @@
+"""Bindings ctypes para sendmmsg(2)/recvmmsg(2) (Linux).
+
+Fora do Linux (ou se a libc não expuser as funções) ``sendmmsg`` e
+``recvmmsg`` valem None e os chamadores usam sendto/recvfrom.
+"""
+from __future__ import annotations
+import ctypes
+import errno
+import os
+import socket
+import sys
+
+
+class iovec(ctypes.Structure):
+    # c_char_p aceita bytes diretamente (guarda a referência) ou um endereço inteiro;
+    # atribuir bytes custa bem menos que ctypes.cast(buf, c_void_p)
+    _fields_ = [("iov_base", ctypes.c_char_p), ("iov_len", ctypes.c_size_t)]
+
+
+# Tamanho de struct sockaddr_in: family(2) port(2) addr(4) zero(8)
+SOCKADDR_IN_SIZE = 16
+
+# recvmmsg(2): retorna assim que houver ao menos um datagrama (não espera os vlen)
+MSG_WAITFORONE = 0x10000
+# msg_flags: datagrama maior que o buffer (foi truncado)
+MSG_TRUNC = 0x20
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr), ("msg_len", ctypes.c_uint)]
+
+
+def _bind(name: str, argtypes: list):
+    """Resolve uma função da libc (somente Linux). Retorna None se indisponível."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        fn = getattr(ctypes.CDLL("libc.so.6", use_errno=True), name)
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = argtypes
+    fn.restype = ctypes.c_int
+    return fn
+
+
+sendmmsg = _bind("sendmmsg", [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int])
+recvmmsg = _bind("recvmmsg", [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int,
+                              ctypes.c_void_p])
+
+
+def check(ret: int) -> int:
+    """Converte o retorno de uma syscall: -1/EAGAIN/EINTR vira 0; outros erros viram OSError."""
+    if ret >= 0:
+        return ret
+    err = ctypes.get_errno()
+    # EINTR também vira 0: o chamador volta ao Python e o sinal (ex.: Ctrl+C) é tratado
+    if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+        return 0
+    raise OSError(err, os.strerror(err))
+
+
+# Prefixo de struct sockaddr_in: sin_family na ordem de bytes do host
+_AF_INET_PREFIX = socket.AF_INET.to_bytes(2, sys.byteorder)
+
+
+def sockaddr_in(addr: tuple[str, int]) -> bytes:
+    """Codifica (ip, porta) IPv4 como os SOCKADDR_IN_SIZE bytes de uma struct sockaddr_in."""
+    ip, port = addr
+    return _AF_INET_PREFIX + port.to_bytes(2, "big") + socket.inet_aton(ip) + bytes(8)
+
+
+def alloc_msgvec(vlen: int, iovlen: int = 1) -> tuple[ctypes.Array, ctypes.Array]:
+    """Aloca vetores mmsghdr/iovec (iovlen iovecs consecutivos por mensagem) já interligados."""
+    msgs = (mmsghdr * vlen)()
+    iovs = (iovec * (vlen * iovlen))()
+    for i in range(vlen):
+        msgs[i].msg_hdr.msg_iov = ctypes.pointer(iovs[i * iovlen])
+        msgs[i].msg_hdr.msg_iovlen = iovlen
+    return msgs, iovs
+
+
+class RecvBatch:
+    """Recebe vários datagramas por chamada recvmmsg(2) em buffers pré-alocados.
+
+    Com with_addr=True também guarda o endereço de origem (IPv4) de cada datagrama,
+    lido por recv_from().
+    """
+
+    def __init__(self, vlen: int = 32, bufsize: int = 2048, with_addr: bool = False):
+        self.vlen = vlen
+        self._msgs, iovs = alloc_msgvec(vlen)
+        self._names = None
+        # sockaddr_in cru -> tupla (ip, porta): poucos peers, então a tupla é reaproveitada
+        # em vez de refazer inet_ntoa/int.from_bytes (e alocar) a cada datagrama
+        self._addrs: dict[bytes, tuple[str, int]] = {}
+        self._filled = vlen  # mensagens cujo msg_namelen precisa ser restaurado
+        if with_addr:
+            self._names = [(ctypes.c_char * SOCKADDR_IN_SIZE)() for _ in range(vlen)]
+            for i, name in enumerate(self._names):
+                self._msgs[i].msg_hdr.msg_name = ctypes.addressof(name)
+        self._bufs = [bytearray(bufsize) for _ in range(vlen)]
+        # Mantém as referências ctypes vivas enquanto os iovecs apontarem para os buffers
+        self._cbufs = [(ctypes.c_char * bufsize).from_buffer(b) for b in self._bufs]
+        for i, cbuf in enumerate(self._cbufs):
+            iovs[i].iov_base = ctypes.addressof(cbuf)
+            iovs[i].iov_len = bufsize
+        self._iovs = iovs
+        self._views = [memoryview(b) for b in self._bufs]
+
+    def recv(self, sock: socket.socket, flags: int = 0) -> list[memoryview]:
+        """Lê até vlen datagramas já enfileirados (ou bloqueia, conforme flags).
+
+        As fatias retornadas apontam para os buffers internos e só valem até a próxima chamada.
+        """
+        n = check(recvmmsg(sock.fileno(), self._msgs, self.vlen, flags, None))
+        return [self._views[i][:self._msgs[i].msg_len] for i in range(n)]
+
+    def recv_from(self, sock: socket.socket,
+                  flags: int = MSG_WAITFORONE) -> list[tuple[memoryview | None, tuple[str, int]]]:
+        """Como recv(), mas retorna pares (datagrama, (ip, porta)); exige with_addr=True.
+
+        Por padrão bloqueia só até o primeiro datagrama (MSG_WAITFORONE).
+        Datagramas maiores que bufsize (truncados pelo kernel) vêm como None.
+        """
+        msgs = self._msgs
+        # msg_namelen é entrada e saída: o kernel só o sobrescreve nas mensagens
+        # preenchidas, então basta restaurar as n da chamada anterior
+        for i in range(self._filled):
+            msgs[i].msg_hdr.msg_namelen = SOCKADDR_IN_SIZE
+        n = check(recvmmsg(sock.fileno(), msgs, self.vlen, flags, None))
+        self._filled = n
+        out = []
+        addrs = self._addrs
+        for i in range(n):
+            name = self._names[i].raw
+            addr = addrs.get(name)
+            if addr is None:
+                if len(addrs) >= 4096:
+                    addrs.clear()
+                addr = addrs[name] = (socket.inet_ntoa(name[4:8]), int.from_bytes(name[2:4], "big"))
+            hdr = msgs[i].msg_hdr
+            view = None if hdr.msg_flags & MSG_TRUNC else self._views[i][:msgs[i].msg_len]
+            out.append((view, addr))
+        return out
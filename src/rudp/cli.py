@@ -4,8 +4,9 @@ import argparse
 import logging
 import os
 from pathlib import Path
-from rudp.server import RUDPServer
+from rudp.server import run_workers
 from rudp.client import RUDPClient
+from rudp.utils import SOCK_BUF_SIZE
 
 
 def _setup_logging(verbose: bool) -> None:
@@ -24,12 +25,20 @@ def main() -> None:
     ps.add_argument("--bind", default="0.0.0.0")
     ps.add_argument("--port", type=int, default=9000)
     ps.add_argument("--drop", type=float, default=0.0, help="Probabilidade de descarte [0..1]")
+    ps.add_argument("--workers", type=int, default=1,
+                    help="Processos na mesma porta (SO_REUSEPORT), cada um fixado em uma CPU")
+    ps.add_argument("--sock-buf-size", type=int, default=SOCK_BUF_SIZE, metavar="BYTES",
+                    help="SO_RCVBUF/SO_SNDBUF de cada socket do servidor")
+    ps.add_argument("--seed", type=int, default=None,
+                    help="Semente da perda simulada (descartes reproduzíveis)")
 
     # Cliente
     pc = sub.add_parser("client", help="Inicia o cliente")
     pc.add_argument("--host", default="127.0.0.1")
     pc.add_argument("--port", type=int, default=9000)
     pc.add_argument("--timeout", type=float, default=1.0)
+    pc.add_argument("--batch-size", type=int, default=64,
+                    help="Máximo de datagramas por chamada sendmmsg")
     
     # Opções de dados (mutuamente exclusivas)
     data_group = pc.add_mutually_exclusive_group()
@@ -43,10 +52,12 @@ def main() -> None:
     log = logging.getLogger("rudp.cli")
 
     if args.cmd == "server":
-        RUDPServer(bind=args.bind, port=args.port, drop_prob=args.drop).run()
+        run_workers(args.bind, args.port, args.workers, drop_prob=args.drop,
+                    sock_buf_size=args.sock_buf_size, seed=args.seed)
     
     elif args.cmd == "client":
-        client = RUDPClient(host=args.host, port=args.port, timeout_s=args.timeout)
+        client = RUDPClient(host=args.host, port=args.port, timeout_s=args.timeout,
+                            batch_size=args.batch_size)
         
         if not client.connect():
             log.error("Falha ao conectar")
@@ -1,13 +1,20 @@
 """Cliente RUDP com suporte a handshake, criptografia, métricas e retransmissão."""
 from __future__ import annotations
+import array
+import asyncio
 import socket
 import logging
-import random
+import os
+import select
+import selectors
+import time
+from collections import deque
 from dataclasses import dataclass
-from rudp.packet import Packet, PT_DATA, PT_ACK, PT_SYN, PT_SYN_ACK, PT_FIN, PAYLOAD_SIZE
-from rudp.connection import Connection, ConnectionState
-from rudp.crypto import CryptoContext, NoCrypto
-from rudp.utils import now_ms
+from rudp import _syscalls
+from rudp.packet import Packet, HeaderTemplate, PT_DATA, PT_ACK, PT_SYN, PT_SYN_ACK, PT_FIN, PAYLOAD_SIZE
+from rudp.connection import ConnectionHot, ConnectionState
+from rudp.crypto import CryptoContext, NoCrypto, openssl_version
+from rudp.utils import tune_socket, CLIENT_SOCK_BUF_SIZE
 
 log = logging.getLogger("rudp.client")
 
@@ -18,8 +25,13 @@ MAX_RETRIES = 5  # Máximo de retransmissões por pacote
 INITIAL_CWND = 1
 INITIAL_SSTHRESH = 64
 
+# Envio em lote: máximo de datagramas por chamada sendmmsg(2)
+MAX_BATCH_SIZE = 64
+# Máximo de ACKs drenados por vez (limita o trabalho por rajada recebida)
+ACK_DRAIN_MAX = 32
 
-@dataclass
+
+@dataclass(slots=True)
 class TransferStats:
     """Métricas de uma transferência de dados."""
     packets_sent: int
@@ -27,39 +39,118 @@ class TransferStats:
     time_ms: int
     throughput_kbps: float
     retransmissions: int = 0
-    cwnd_history: list = None  # Histórico de cwnd para gráficos
+    cwnd_history: array.array | None = None  # Histórico de cwnd para gráficos (um por pacote)
+
+
+class _BatchedUdp:
+    """Acumula datagramas (cabeçalho + payload) e os envia com uma única chamada sendmmsg(2).
+
+    Cada datagrama usa dois iovecs (scatter-gather): o payload nunca é
+    concatenado ao cabeçalho. O socket deve estar conectado (connect), então as
+    mensagens não levam endereço. Fora do Linux (ou sem sendmmsg na libc) faz
+    um sendmsg por datagrama.
+    """
+
+    def __init__(self, sock: socket.socket, batch_size: int = MAX_BATCH_SIZE):
+        self.sock = sock
+        self.batch_size = max(1, batch_size)
+        self._pending: list[tuple[bytes, bytes | memoryview]] = []
+        # Vetores mmsghdr/iovec (2 por mensagem) alocados uma vez e reaproveitados a cada flush
+        self._msgs, self._iovs = _syscalls.alloc_msgvec(self.batch_size, 2)
+
+    def send(self, header: bytes, payload: bytes | memoryview) -> None:
+        """Enfileira um datagrama; envia o lote quando estiver cheio."""
+        self._pending.append((header, payload))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Envia todos os datagramas pendentes."""
+        pending, self._pending = self._pending, []
+        if _syscalls.sendmmsg is None:
+            for bufs in pending:
+                self._send_one(bufs)
+            return
+        i = 0
+        while i < len(pending):
+            sent = self._sendmmsg(pending[i:])
+            if sent == 0:
+                # Buffer do kernel cheio (EAGAIN): envia um datagrama esperando espaço
+                self._send_one(pending[i])
+                sent = 1
+            i += sent
+
+    def _send_one(self, bufs: tuple[bytes, bytes | memoryview]) -> None:
+        """Envia um datagrama; em socket não bloqueante, espera o buffer do kernel liberar."""
+        while True:
+            try:
+                self.sock.sendmsg(bufs)
+                return
+            except BlockingIOError:
+                select.select((), (self.sock,), ())
+
+    def _sendmmsg(self, batch: list[tuple[bytes, bytes | memoryview]]) -> int:
+        iovs = self._iovs
+        for i, (header, payload) in enumerate(batch):
+            if not isinstance(payload, bytes):
+                # ctypes não obtém o endereço de um buffer somente leitura (memoryview
+                # de bytes) sem custo maior que a própria cópia de ~1 KB
+                payload = bytes(payload)
+            iov = iovs[2 * i]
+            iov.iov_base = header
+            iov.iov_len = len(header)
+            iov = iovs[2 * i + 1]
+            iov.iov_base = payload
+            iov.iov_len = len(payload)
+        return _syscalls.check(_syscalls.sendmmsg(self.sock.fileno(), self._msgs, len(batch), 0))
 
 
 class RUDPClient:
     """Cliente RUDP com 3-way handshake, criptografia e controle de congestionamento."""
     
     def __init__(self, host: str, port: int, timeout_s: float = 1.0, 
-                 use_crypto: bool = True, cc_enabled: bool = True):
+                 use_crypto: bool = True, cc_enabled: bool = True,
+                 batch_size: int = MAX_BATCH_SIZE, sock_buf_size: int = CLIENT_SOCK_BUF_SIZE):
         self.host = host
         self.port = port
         self.timeout_s = timeout_s
         self.cc_enabled = cc_enabled  # Controle de congestionamento
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        tune_socket(self.sock, sock_buf_size, dont_fragment=True)
+        # O kernel dobra o valor pedido e o limita a net.core.{w,r}mem_max
+        log.debug("Buffers do socket: SO_SNDBUF=%d SO_RCVBUF=%d",
+                  self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF),
+                  self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
         self.sock.settimeout(timeout_s)
-        self.conn = Connection()
+        # Endereço do servidor resolvido uma vez; com o socket conectado o kernel
+        # guarda o destino e os envios usam send/recv sem sockaddr por datagrama
+        self._peer = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+        self.sock.connect(self._peer)
+        self._batch = _BatchedUdp(self.sock, batch_size)
+        # Buffer de recepção reutilizado por todas as leituras (sem alocar por datagrama)
+        self._rxbuf = bytearray(65536)
+        self._rxview = memoryview(self._rxbuf)
+        # Recepção em lote de ACKs (recvmmsg); None fora do Linux
+        self._rx_batch = _syscalls.RecvBatch(ACK_DRAIN_MAX) if _syscalls.recvmmsg is not None else None
+        # O cliente só usa os campos quentes (seq, janelas); buffers de recepção ficam no servidor
+        self.conn = ConnectionHot()
         # ISN (Initial Sequence Number) aleatório
-        self.conn.local_seq = random.randint(0, 0xFFFFFFFF)
+        self.conn.local_seq = int.from_bytes(os.urandom(4), "big")
         # Criptografia
         if use_crypto:
             self.crypto = CryptoContext()
-            log.info("Criptografia habilitada")
+            log.info("Criptografia habilitada (AES-128-GCM, %s)", openssl_version())
         else:
             self.crypto = NoCrypto()
             log.info("Criptografia desabilitada")
         log.info("Controle de congestionamento: %s", "ON" if cc_enabled else "OFF")
     
-    def connect(self) -> bool:
-        """Executa 3-way handshake: SYN → SYN-ACK → ACK."""
+    def _syn_packet(self) -> bytes | None:
+        """Monta o SYN (com a chave de criptografia no payload) e entra em SYN_SENT."""
         if self.conn.state != ConnectionState.CLOSED:
             log.warning("Conexão já está em estado %s", self.conn.state.name)
-            return False
+            return None
         
-        # Enviar SYN com chave de criptografia no payload
         crypto_key = self.crypto.get_key() if hasattr(self.crypto, 'get_key') else b""
         syn_pkt = Packet(
             ptype=PT_SYN,
@@ -69,229 +160,447 @@ class RUDPClient:
             wnd=0,
             payload=crypto_key,
         )
-        self.sock.sendto(syn_pkt.encode(), (self.host, self.port))
         self.conn.state = ConnectionState.SYN_SENT
         log.info("SYN enviado seq=%d (crypto_key=%d bytes)", self.conn.local_seq, len(crypto_key))
+        return syn_pkt.encode()
+
+    def _on_syn_ack(self, raw: bytes | memoryview | None) -> bytes | None:
+        """Trata a resposta ao SYN (None = timeout); retorna o ACK final a enviar, se aceita."""
+        if raw is None:
+            log.error("Timeout aguardando SYN-ACK")
+            self.conn.state = ConnectionState.CLOSED
+            return None
         
-        # Aguardar SYN-ACK
-        try:
-            raw, addr = self.sock.recvfrom(65535)
+        pkt = Packet.decode(raw)
+        if pkt.ptype != PT_SYN_ACK or pkt.ack != self.conn.local_seq:
+            log.warning("Resposta inesperada: ptype=%d, ack=%d", pkt.ptype, pkt.ack)
+            self.conn.state = ConnectionState.CLOSED
+            return None
+        
+        log.info("SYN-ACK recebido de %s, ack=%d, seq=%d", self._peer, pkt.ack, pkt.seq)
+        self.conn.remote_seq = pkt.seq
+        self.conn.remote_addr = self._peer
+        
+        # ACK final
+        self.conn.local_seq += 1
+        ack_pkt = Packet(
+            ptype=PT_ACK,
+            flags=0,
+            seq=self.conn.local_seq,
+            ack=pkt.seq,
+            wnd=0,
+            payload=b"",
+        )
+        self.conn.state = ConnectionState.ESTABLISHED
+        log.info("ACK enviado. Conexão ESTABLISHED")
+        return ack_pkt.encode()
+
+    def _fin_packet(self) -> bytes:
+        """Monta o FIN e entra em FIN_WAIT."""
+        self.conn.local_seq += 1
+        fin_pkt = Packet(
+            ptype=PT_FIN,
+            flags=0,
+            seq=self.conn.local_seq,
+            ack=self.conn.remote_seq,
+            wnd=0,
+            payload=b"",
+        )
+        self.conn.state = ConnectionState.FIN_WAIT
+        log.info("FIN enviado seq=%d", self.conn.local_seq)
+        return fin_pkt.encode()
+
+    def _on_fin_ack(self, raw: bytes | memoryview | None) -> None:
+        """Trata a resposta ao FIN (None = timeout) e marca a conexão como CLOSED."""
+        if raw is None:
+            log.warning("Timeout aguardando ACK do FIN")
+        else:
             pkt = Packet.decode(raw)
-            
-            if pkt.ptype == PT_SYN_ACK and pkt.ack == self.conn.local_seq:
-                log.info("SYN-ACK recebido de %s, ack=%d, seq=%d", addr, pkt.ack, pkt.seq)
-                self.conn.remote_seq = pkt.seq
-                self.conn.remote_addr = addr
-                
-                # Enviar ACK final
-                self.conn.local_seq += 1
-                ack_pkt = Packet(
-                    ptype=PT_ACK,
-                    flags=0,
-                    seq=self.conn.local_seq,
-                    ack=pkt.seq,
-                    wnd=0,
-                    payload=b"",
-                )
-                self.sock.sendto(ack_pkt.encode(), (self.host, self.port))
-                self.conn.state = ConnectionState.ESTABLISHED
-                log.info("ACK enviado. Conexão ESTABLISHED")
-                return True
+            if pkt.ptype == PT_ACK:
+                log.info("ACK recebido para FIN. Conexão encerrada.")
             else:
-                log.warning("Resposta inesperada: ptype=%d, ack=%d", pkt.ptype, pkt.ack)
-                self.conn.state = ConnectionState.CLOSED
-                return False
-                
-        except socket.timeout:
-            log.error("Timeout aguardando SYN-ACK")
-            self.conn.state = ConnectionState.CLOSED
-            return False
+                log.warning("Resposta inesperada para FIN: ptype=%d", pkt.ptype)
+        self.conn.state = ConnectionState.CLOSED
+
+    def _recv(self) -> memoryview | None:
+        """Lê um datagrama no buffer reutilizado; None em timeout."""
+        try:
+            n = self.sock.recv_into(self._rxbuf)
+        except (socket.timeout, ConnectionRefusedError):
+            # Socket conectado: ICMP port unreachable chega como ConnectionRefusedError
+            return None
+        return self._rxview[:n]
 
-    def _send_packet_reliable(self, pkt: Packet) -> tuple[bool, int]:
-        """Envia pacote com retransmissão. Retorna (sucesso, retransmissões)."""
-        retries = 0
+    def connect(self) -> bool:
+        """Executa 3-way handshake: SYN → SYN-ACK → ACK."""
+        syn = self._syn_packet()
+        if syn is None:
+            return False
+        self.sock.send(syn)
         
-        while retries <= MAX_RETRIES:
-            # Verificar controle de fluxo (rwnd)
-            if self.conn.remote_wnd == 0:
-                log.debug("rwnd=0, aguardando...")
-                # Espera por um ACK que libere a janela
-                try:
-                    raw, _ = self.sock.recvfrom(65535)
-                    ack = Packet.decode(raw)
-                    if ack.ptype == PT_ACK:
-                        self.conn.remote_wnd = ack.wnd
-                        log.debug("rwnd atualizado para %d", ack.wnd)
-                        if ack.wnd == 0:
-                            continue
-                except socket.timeout:
-                    retries += 1
-                    continue
-            
-            self.sock.sendto(pkt.encode(), (self.host, self.port))
-            
-            if retries > 0:
-                log.debug("Retransmissão [%d/%d] seq=%d", retries, MAX_RETRIES, pkt.seq)
-            
+        # Aguardar SYN-ACK
+        ack = self._on_syn_ack(self._recv())
+        if ack is None:
+            return False
+        self.sock.send(ack)
+        return True
+
+    def _reap_acks(self, xfer: _Transfer) -> None:
+        """Drena os ACKs já enfileirados (até ACK_DRAIN_MAX) e os entrega à transferência.
+
+        O socket está em modo não bloqueante: com recvmmsg(2) a fila é lida em
+        uma única chamada; sem ela, recv_into é repetido até BlockingIOError.
+        """
+        if self._rx_batch is not None:
             try:
-                raw, _ = self.sock.recvfrom(65535)
-                ack = Packet.decode(raw)
-                
-                if ack.ptype == PT_ACK:
-                    # Atualizar rwnd do servidor
-                    self.conn.remote_wnd = ack.wnd
-                    
-                    # ACK cumulativo: confirma tudo até ack.ack
-                    if ack.ack >= pkt.seq:
-                        log.debug("ACK recebido ack=%d wnd=%d (confirmou seq=%d)", 
-                                 ack.ack, ack.wnd, pkt.seq)
-                        self.conn.last_ack = ack.ack
-                        return True, retries
-                    else:
-                        log.debug("ACK parcial ack=%d (esperava >= %d)", ack.ack, pkt.seq)
-                else:
-                    log.warning("Pacote inesperado ptype=%d", ack.ptype)
-                    
-            except socket.timeout:
-                retries += 1
-                if retries <= MAX_RETRIES:
-                    log.debug("Timeout para seq=%d, tentativa %d/%d", pkt.seq, retries, MAX_RETRIES)
-        
-        log.warning("Falha após %d retransmissões para seq=%d", MAX_RETRIES, pkt.seq)
-        return False, retries
+                acks = self._rx_batch.recv(self.sock, socket.MSG_DONTWAIT)
+            except ConnectionRefusedError:
+                return
+            for raw in acks:
+                xfer.on_ack(raw)
+            return
+        for _ in range(ACK_DRAIN_MAX):
+            try:
+                n = self.sock.recv_into(self._rxbuf)
+            except (BlockingIOError, ConnectionRefusedError):
+                break
+            xfer.on_ack(self._rxview[:n])
 
-    def send_data(self, data: bytes) -> TransferStats:
-        """Fragmenta dados e envia com retransmissão e controle de congestionamento."""
+    def send_data(self, data: bytes | bytearray | memoryview) -> TransferStats:
+        """Fragmenta dados e envia com janela deslizante, retransmissão e controle de congestionamento.
+
+        Mantém até min(cwnd, rwnd) pacotes em voo: novos pacotes saem em lote
+        (sendmmsg) assim que ACKs cumulativos liberam a janela. Cada pacote em
+        voo tem seu próprio timer; quando o do mais antigo não confirmado expira,
+        só ele é retransmitido (o servidor guarda os fora de ordem).
+        """
         if self.conn.state != ConnectionState.ESTABLISHED:
             log.error("Não é possível enviar: conexão não estabelecida (state=%s)", 
                       self.conn.state.name)
-            return TransferStats(0, 0, 0, 0.0, 0, [])
+            return TransferStats(0, 0, 0, 0.0, 0, array.array("I"))
         
-        start_ms = now_ms()
-        packets_sent = 0
-        bytes_sent = 0
-        total_retransmissions = 0
-        cwnd_history = []
+        xfer = _Transfer(self, data)
+        # Socket não bloqueante durante a transferência: a espera é feita no seletor
+        self.sock.setblocking(False)
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        try:
+            while not xfer.done:
+                if xfer.fill(self._batch.send):
+                    self._batch.flush()
+                
+                # Aguardar ACKs até o timer do pacote base expirar
+                wait_s = xfer.wait_s()
+                if wait_s > 0 and sel.select(wait_s):
+                    self._reap_acks(xfer)
+                    continue
+                
+                retx = xfer.expire()
+                if retx is None:
+                    break
+                self._batch.send(*retx)
+                self._batch.flush()
+        finally:
+            sel.close()
+            self.sock.settimeout(self.timeout_s)
+        return xfer.finish()
+
+    def send_message(self, message: str) -> None:
+        """Envia mensagem (wrapper para send_data)."""
+        self.send_data(message.encode("utf-8"))
+
+    def close(self) -> None:
+        """Encerra conexão com FIN."""
+        if self.conn.state != ConnectionState.ESTABLISHED:
+            log.warning("Não é possível fechar: conexão não estabelecida")
+            self.sock.close()
+            return
+        
+        self.sock.send(self._fin_packet())
+        self._on_fin_ack(self._recv())
+        self.sock.close()
+
+
+class _Transfer:
+    """Estado de uma transferência com janela deslizante, independente de E/S.
+
+    O RUDPClient (seletor + sendmmsg) e o AsyncRUDPClient (asyncio) apenas
+    enviam os pacotes que ela produz e lhe entregam os ACKs recebidos.
+    """
+
+    def __init__(self, client: RUDPClient, data: bytes | bytearray | memoryview):
+        self.conn = conn = client.conn
+        self.crypto = client.crypto
+        self.cc_enabled = client.cc_enabled
+        self.start_ns = time.monotonic_ns()
+        self.retransmissions = 0
         
         # Inicializar CC
         if self.cc_enabled:
-            self.conn.cwnd = INITIAL_CWND
-            self.conn.ssthresh = INITIAL_SSTHRESH
+            conn.cwnd = INITIAL_CWND
+            conn.ssthresh = INITIAL_SSTHRESH
         else:
             # CC desabilitado: janela fixa grande
-            self.conn.cwnd = 10000
-            self.conn.ssthresh = 10000
+            conn.cwnd = 10000
+            conn.ssthresh = 10000
+        self.ca_acked = 0  # Pacotes confirmados desde o último +1 em Congestion Avoidance
+        # Nível de log avaliado uma vez por transferência: os log.debug por pacote
+        # só montam argumentos se DEBUG estiver habilitado
+        self.dbg = log.isEnabledFor(logging.DEBUG)
         
-        # Fragmentar em chunks
-        chunks = [data[i:i+PAYLOAD_SIZE] for i in range(0, len(data), PAYLOAD_SIZE)]
-        total_chunks = len(chunks)
+        # Fragmentação sob demanda: cada chunk é uma fatia de memoryview criada
+        # só quando entra na janela (sem cópia do buffer nem lista de chunks)
+        self.mv = memoryview(data).cast("B")
+        self.total_chunks = (len(self.mv) + PAYLOAD_SIZE - 1) // PAYLOAD_SIZE
+        # Histórico de cwnd pré-alocado: um unsigned int por chunk (4 bytes, sem PyLong)
+        self.cwnd_history = array.array("I", [0]) * self.total_chunks
         
         log.info("Enviando %d bytes em %d pacotes (cwnd=%d, ssthresh=%d)", 
-                 len(data), total_chunks, self.conn.cwnd, self.conn.ssthresh)
+                 len(self.mv), self.total_chunks, conn.cwnd, conn.ssthresh)
         
-        for i, chunk in enumerate(chunks):
+        self.first_seq = conn.local_seq + 1  # seq do chunk 0
+        # Cabeçalho DATA pré-montado: por pacote só seq, tamanho e CRC mudam
+        self.header = HeaderTemplate(PT_DATA, 0, conn.remote_seq, 0)
+        self.timeout_ns = int(client.timeout_s * 1_000_000_000)
+        # Pacotes em voo: chunk → (cabeçalho, payload cifrado, instante do último envio)
+        self.in_flight: dict[int, tuple[bytes, bytes | memoryview, int]] = {}
+        self.retries = 0   # Retransmissões do chunk base
+        self.base = 0      # Primeiro chunk não confirmado
+        self.next_new = 0  # Próximo chunk nunca enviado
+
+    @property
+    def done(self) -> bool:
+        return self.base >= self.total_chunks
+
+    def fill(self, send) -> int:
+        """Codifica e passa a send(cabeçalho, payload) os chunks novos que cabem na janela.
+
+        Retorna quantos chunks foram enviados.
+        """
+        conn = self.conn
+        # Janela efetiva: min(cwnd, rwnd); rwnd=0 ainda permite 1 pacote de sonda
+        effective_wnd = max(1, min(conn.cwnd, conn.remote_wnd))
+        end = min(self.base + effective_wnd, self.total_chunks)
+        start = self.next_new
+        if start >= end:
+            return 0
+        sent_ns = time.monotonic_ns()
+        for i in range(start, end):
             # Registrar cwnd atual
-            cwnd_history.append(self.conn.cwnd)
-            
-            # Janela efetiva: min(cwnd, rwnd)
-            effective_wnd = min(self.conn.cwnd, self.conn.remote_wnd)
-            log.debug("Janela efetiva: min(cwnd=%d, rwnd=%d) = %d", 
-                     self.conn.cwnd, self.conn.remote_wnd, effective_wnd)
-            
-            self.conn.local_seq += 1
-            # Cifrar payload
-            encrypted_chunk = self.crypto.encrypt(chunk)
-            pkt = Packet(
-                ptype=PT_DATA,
-                flags=0,
-                seq=self.conn.local_seq,
-                ack=self.conn.remote_seq,
-                wnd=0,
-                payload=encrypted_chunk,
-            )
-            
-            log.debug("DATA [%d/%d] seq=%d cwnd=%d", i+1, total_chunks, 
-                     self.conn.local_seq, self.conn.cwnd)
-            
-            success, retries = self._send_packet_reliable(pkt)
-            total_retransmissions += retries
-            
-            if success:
-                packets_sent += 1
-                bytes_sent += len(chunk)
-                
-                # Controle de congestionamento: sucesso
-                if self.cc_enabled:
-                    if retries == 0:
-                        # Sem timeout: aumentar cwnd
-                        if self.conn.cwnd < self.conn.ssthresh:
-                            # Slow Start: dobra (cresce exponencialmente)
-                            self.conn.cwnd = min(self.conn.cwnd * 2, self.conn.ssthresh)
-                            log.debug("Slow Start: cwnd → %d", self.conn.cwnd)
-                        else:
-                            # Congestion Avoidance: cresce linearmente
-                            self.conn.cwnd += 1
-                            log.debug("Congestion Avoidance: cwnd → %d", self.conn.cwnd)
-                    else:
-                        # Houve timeout/retransmissão: reduzir
-                        self.conn.ssthresh = max(self.conn.cwnd // 2, 1)
-                        self.conn.cwnd = INITIAL_CWND
-                        log.debug("Timeout detectado: ssthresh=%d, cwnd=%d", 
-                                 self.conn.ssthresh, self.conn.cwnd)
-                # Se CC desabilitado, cwnd permanece fixo
-            else:
-                log.error("Falha ao enviar pacote seq=%d, abortando", self.conn.local_seq)
-                break
+            self.cwnd_history[i] = conn.cwnd
+            seq = self.first_seq + i
+            chunk = self.mv[i*PAYLOAD_SIZE:(i+1)*PAYLOAD_SIZE]
+            payload = self.crypto.encrypt(chunk, seq)
+            header = self.header.encode_header(seq, payload)
+            self.in_flight[i] = (header, payload, sent_ns)
+            send(header, payload)
+            if self.dbg:
+                log.debug("DATA [%d/%d] seq=%d cwnd=%d", i+1, self.total_chunks, 
+                         seq, conn.cwnd)
+        self.next_new = end
+        return end - start
+
+    def wait_s(self) -> float:
+        """Segundos até o timer do chunk base expirar (<= 0: já expirou)."""
+        return (self.in_flight[self.base][2] + self.timeout_ns - time.monotonic_ns()) / 1e9
+
+    def on_ack(self, raw: bytes | memoryview) -> None:
+        """Processa um ACK cumulativo: avança base, libera pacotes e cresce cwnd."""
+        ack = Packet.decode(raw)
+        if ack.ptype != PT_ACK:
+            log.warning("Pacote inesperado ptype=%d", ack.ptype)
+            return
+        conn = self.conn
+        # Atualizar rwnd do servidor
+        conn.remote_wnd = ack.wnd
+        # ACK cumulativo: confirma tudo até ack.ack (nunca além do que já foi enviado)
+        prev_base = self.base
+        if ack.ack < self.first_seq + prev_base:
+            if self.dbg:
+                log.debug("ACK duplicado ack=%d (esperava >= %d)", ack.ack, self.first_seq + prev_base)
+            return
+        base = self.base = min(ack.ack - self.first_seq + 1, self.next_new)
+        conn.last_ack = ack.ack
+        if self.dbg:
+            log.debug("ACK recebido ack=%d wnd=%d", ack.ack, ack.wnd)
+        if base == prev_base:
+            return
+        for i in range(prev_base, base):
+            del self.in_flight[i]
+        self.retries = 0
         
-        elapsed_ms = now_ms() - start_ms
-        throughput = (bytes_sent / 1024) / (elapsed_ms / 1000) if elapsed_ms > 0 else 0.0
+        if not self.cc_enabled:
+            return
+        if conn.cwnd < conn.ssthresh:
+            # Slow Start: +1 por pacote confirmado (dobra a cada RTT)
+            conn.cwnd = min(conn.cwnd + base - prev_base, conn.ssthresh)
+            if self.dbg:
+                log.debug("Slow Start: cwnd → %d", conn.cwnd)
+        else:
+            # Congestion Avoidance: +1 a cada cwnd pacotes confirmados (linear por RTT)
+            self.ca_acked += base - prev_base
+            if self.ca_acked >= conn.cwnd:
+                self.ca_acked -= conn.cwnd
+                conn.cwnd += 1
+                if self.dbg:
+                    log.debug("Congestion Avoidance: cwnd → %d", conn.cwnd)
+
+    def expire(self) -> tuple[bytes, bytes | memoryview] | None:
+        """Timer do chunk base expirou: retorna (cabeçalho, payload) a retransmitir (None = abortar)."""
+        self.retries += 1
+        if self.retries > MAX_RETRIES:
+            log.error("Falha após %d retransmissões para seq=%d, abortando", 
+                      MAX_RETRIES, self.first_seq + self.base)
+            return None
+        header, payload, _ = self.in_flight[self.base]
+        self.in_flight[self.base] = (header, payload, time.monotonic_ns())
+        self.retransmissions += 1
+        log.debug("Retransmissão seq=%d", self.first_seq + self.base)
+        # Reduzir janela (se CC desabilitado, cwnd permanece fixo)
+        if self.cc_enabled:
+            conn = self.conn
+            conn.ssthresh = max(conn.cwnd // 2, 1)
+            conn.cwnd = INITIAL_CWND
+            log.debug("Timeout detectado: ssthresh=%d, cwnd=%d", conn.ssthresh, conn.cwnd)
+        return header, payload
+
+    def finish(self) -> TransferStats:
+        """Encerra a transferência: atualiza local_seq e monta as métricas."""
+        base = self.base
+        # Transferência abortada: descartar posições de chunks nunca enviados
+        del self.cwnd_history[self.next_new:]
+        
+        # Maior seq já colocado na rede (não base - 1): se a transferência abortou com
+        # pacotes em voo, o servidor pode já tê-los recebido; reutilizar esses seqs
+        # entregaria dados antigos e repetiria o nonce do AES-GCM (derivado do seq)
+        self.conn.local_seq = self.first_seq + self.next_new - 1
+        bytes_sent = min(base * PAYLOAD_SIZE, len(self.mv))
+        # Relógio monotônico em ns: imune a ajustes do relógio do sistema e preciso
+        # mesmo para transferências abaixo de 1 ms; converte para ms só na saída
+        elapsed_ns = time.monotonic_ns() - self.start_ns
+        throughput = (bytes_sent / 1024) / (elapsed_ns / 1e9) if elapsed_ns > 0 else 0.0
         
         stats = TransferStats(
-            packets_sent=packets_sent,
+            packets_sent=base,
             bytes_sent=bytes_sent,
-            time_ms=elapsed_ms,
+            time_ms=elapsed_ns // 1_000_000,
             throughput_kbps=throughput,
-            retransmissions=total_retransmissions,
-            cwnd_history=cwnd_history,
+            retransmissions=self.retransmissions,
+            cwnd_history=self.cwnd_history,
         )
         log.info("Transferência: %d pkts, %d bytes, %dms, %.2f KB/s, %d retx, cwnd_final=%d",
                  stats.packets_sent, stats.bytes_sent, stats.time_ms, 
                  stats.throughput_kbps, stats.retransmissions, self.conn.cwnd)
         return stats
 
-    def send_message(self, message: str) -> None:
+
+class _ClientProtocol(asyncio.DatagramProtocol):
+    """Enfileira os datagramas recebidos para o AsyncRUDPClient."""
+
+    def __init__(self):
+        self.rx: deque[bytes] = deque()
+        self.ready = asyncio.Event()
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self.rx.append(data)
+        self.ready.set()
+
+    def error_received(self, exc: Exception) -> None:
+        # Socket conectado: ICMP port unreachable; tratado como perda (timeout)
+        log.debug("Erro no socket ignorado: %s", exc)
+
+
+class AsyncRUDPClient(RUDPClient):
+    """Variante asyncio do RUDPClient: connect, send_data e close são corrotinas.
+
+    Usa o mesmo socket (ajustado e conectado) e a mesma lógica de janela; vários
+    clientes compartilham um event loop em vez de ocupar uma thread cada.
+    """
+
+    _transport: asyncio.DatagramTransport | None = None
+    _proto: _ClientProtocol | None = None
+
+    async def _endpoint(self) -> asyncio.DatagramTransport:
+        """Registra o socket no event loop corrente (uma única vez)."""
+        if self._transport is None:
+            loop = asyncio.get_running_loop()
+            self._transport, self._proto = await loop.create_datagram_endpoint(
+                _ClientProtocol, sock=self.sock
+            )
+        return self._transport
+
+    async def _recv_async(self, timeout: float) -> bytes | None:
+        """Próximo datagrama recebido; None se o timeout expirar antes."""
+        proto = self._proto
+        if not proto.rx:
+            proto.ready.clear()
+            try:
+                await asyncio.wait_for(proto.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return proto.rx.popleft()
+
+    async def connect(self) -> bool:
+        """Executa 3-way handshake: SYN → SYN-ACK → ACK."""
+        syn = self._syn_packet()
+        if syn is None:
+            return False
+        transport = await self._endpoint()
+        transport.sendto(syn)
+        
+        ack = self._on_syn_ack(await self._recv_async(self.timeout_s))
+        if ack is None:
+            return False
+        transport.sendto(ack)
+        return True
+
+    async def send_data(self, data: bytes | bytearray | memoryview) -> TransferStats:
+        """Mesmo algoritmo de RUDPClient.send_data, esperando ACKs no event loop."""
+        if self.conn.state != ConnectionState.ESTABLISHED:
+            log.error("Não é possível enviar: conexão não estabelecida (state=%s)", 
+                      self.conn.state.name)
+            return TransferStats(0, 0, 0, 0.0, 0, array.array("I"))
+        
+        transport = await self._endpoint()
+        
+        def sendto(header: bytes, payload: bytes | memoryview) -> None:
+            # DatagramTransport.sendto não aceita scatter-gather: um único buffer
+            transport.sendto(b"".join((header, payload)))
+        
+        xfer = _Transfer(self, data)
+        while not xfer.done:
+            xfer.fill(sendto)
+            
+            raw = await self._recv_async(max(xfer.wait_s(), 0.0))
+            if raw is not None:
+                xfer.on_ack(raw)
+                # Drenar ACKs já enfileirados antes de reavaliar a janela
+                rx = self._proto.rx
+                while rx:
+                    xfer.on_ack(rx.popleft())
+                continue
+            
+            retx = xfer.expire()
+            if retx is None:
+                break
+            sendto(*retx)
+        return xfer.finish()
+
+    async def send_message(self, message: str) -> None:
         """Envia mensagem (wrapper para send_data)."""
-        self.send_data(message.encode("utf-8"))
+        await self.send_data(message.encode("utf-8"))
 
-    def close(self) -> None:
+    async def close(self) -> None:
         """Encerra conexão com FIN."""
         if self.conn.state != ConnectionState.ESTABLISHED:
             log.warning("Não é possível fechar: conexão não estabelecida")
-            self.sock.close()
-            return
-        
-        self.conn.local_seq += 1
-        fin_pkt = Packet(
-            ptype=PT_FIN,
-            flags=0,
-            seq=self.conn.local_seq,
-            ack=self.conn.remote_seq,
-            wnd=0,
-            payload=b"",
-        )
-        self.sock.sendto(fin_pkt.encode(), (self.host, self.port))
-        self.conn.state = ConnectionState.FIN_WAIT
-        log.info("FIN enviado seq=%d", self.conn.local_seq)
-        
-        try:
-            raw, _ = self.sock.recvfrom(65535)
-            pkt = Packet.decode(raw)
-            if pkt.ptype == PT_ACK:
-                log.info("ACK recebido para FIN. Conexão encerrada.")
+            if self._transport is not None:
+                self._transport.close()
             else:
-                log.warning("Resposta inesperada para FIN: ptype=%d", pkt.ptype)
-        except socket.timeout:
-            log.warning("Timeout aguardando ACK do FIN")
+                self.sock.close()
+            return
         
-        self.conn.state = ConnectionState.CLOSED
-        self.sock.close()
+        transport = await self._endpoint()
+        transport.sendto(self._fin_packet())
+        self._on_fin_ack(await self._recv_async(self.timeout_s))
+        transport.close()
@@ -2,7 +2,13 @@
 from __future__ import annotations
 from enum import Enum, auto
 from dataclasses import dataclass, field
-from typing import Tuple
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    from rudp.crypto import CryptoContext, NoCrypto
+
+# Slots do buffer de fora de ordem: cobre a maior rwnd anunciada (16 MiB / 1 KiB)
+MAX_REORDER = 16384
 
 
 class ConnectionState(Enum):
@@ -15,9 +21,12 @@ class ConnectionState(Enum):
     CLOSE_WAIT = auto()     # Recebeu FIN, enviou ACK
 
 
-@dataclass
-class Connection:
-    """Representa uma conexão RUDP ativa."""
+@dataclass(slots=True)
+class ConnectionHot:
+    """Campos lidos/escritos a cada pacote: estado, números de sequência e janelas.
+
+    É tudo o que o cliente precisa; os slots ficam juntos no início da instância.
+    """
     state: ConnectionState = ConnectionState.CLOSED
     remote_addr: Tuple[str, int] | None = None
     local_seq: int = 0      # Próximo seq a enviar
@@ -26,11 +35,6 @@ class Connection:
     
     # Entrega ordenada (servidor)
     expected_seq: int = 0   # Próximo seq esperado em ordem
-    out_of_order: dict = field(default_factory=dict)  # seq → payload (buffer)
-    
-    # Buffer de dados recebidos (servidor) - em ordem
-    recv_buffer: bytes = field(default=b"")
-    recv_buffer_max: int = 16 * 1024 * 1024  # Limite do buffer (~16MB) para >=10k pacotes
         
     # Controle de fluxo (cliente)
     remote_wnd: int = 64    # rwnd anunciado pelo servidor (em pacotes)
@@ -38,6 +42,27 @@ class Connection:
     # Controle de congestionamento (cliente)
     cwnd: int = 1           # Janela de congestionamento (em pacotes)
     ssthresh: int = 64      # Slow start threshold
+
+
+@dataclass(slots=True)
+class Connection(ConnectionHot):
+    """Representa uma conexão RUDP ativa no servidor: campos quentes + buffers de recepção."""
+    # Contexto de criptografia da conexão (definido no SYN)
+    crypto: CryptoContext | NoCrypto | None = None
+    
+    # Buffer de fora de ordem: anel de max_reorder slots indexado por seq % max_reorder,
+    # mais um bitmap (int) em que o bit i indica que expected_seq + i está no anel.
+    # O anel (~128 KiB) só é alocado no primeiro pacote fora de ordem: cada SYN cria
+    # uma Connection, e a maioria delas nunca vê reordenação
+    max_reorder: int = MAX_REORDER
+    oo_ring: list[bytes | None] | None = None
+    oo_bits: int = 0
+    
+    # Buffer de dados recebidos (servidor) - em ordem: lista de payloads (append sem
+    # copiar bytes), concatenados só na leitura por read_all()
+    recv_buffer: list[bytes] = field(default_factory=list)
+    recv_buffer_len: int = 0  # Total de bytes em recv_buffer
+    recv_buffer_max: int = 16 * 1024 * 1024  # Limite do buffer (~16MB) para >=10k pacotes
     
     # Métricas
     packets_recv: int = 0
@@ -46,5 +71,37 @@ class Connection:
     
     def get_rwnd(self, payload_size: int = 1024) -> int:
         """Calcula rwnd disponível (em pacotes)."""
-        bytes_free = max(0, self.recv_buffer_max - len(self.recv_buffer))
+        bytes_free = max(0, self.recv_buffer_max - self.recv_buffer_len)
         return bytes_free // payload_size
+    
+    def oo_put(self, seq: int, payload: bytes) -> bool:
+        """Guarda um payload com seq > expected_seq. False se duplicado ou além da janela."""
+        off = seq - self.expected_seq
+        if off >= self.max_reorder or self.oo_bits >> off & 1:
+            return False
+        ring = self.oo_ring
+        if ring is None:
+            ring = self.oo_ring = [None] * self.max_reorder
+        ring[seq % self.max_reorder] = payload
+        self.oo_bits |= 1 << off
+        return True
+    
+    def oo_advance(self) -> bytes | None:
+        """Chamado a cada avanço de expected_seq: retorna o payload bufferizado do novo
+        expected_seq (e libera o slot), ou None se ele ainda não chegou."""
+        bits = self.oo_bits >> 1
+        self.oo_bits = bits
+        if not bits & 1:
+            return None
+        # bit ligado => oo_put já alocou o anel
+        slot = self.expected_seq % self.max_reorder
+        payload = self.oo_ring[slot]
+        self.oo_ring[slot] = None
+        return payload
+    
+    def read_all(self) -> bytes:
+        """Retorna os dados entregues em ordem e esvazia o buffer."""
+        data = b"".join(self.recv_buffer)
+        self.recv_buffer.clear()
+        self.recv_buffer_len = 0
+        return data
@@ -1,59 +1,79 @@
 """Módulo de criptografia para protocolo RUDP."""
 from __future__ import annotations
 import os
+import functools
 import logging
-from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import base64
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 log = logging.getLogger("rudp.crypto")
 
+KEY_SIZE = 16  # AES-128
 
+
+def openssl_version() -> str:
+    """Retorna a versão do OpenSSL usado pelo cryptography (AES-NI via EVP)."""
+    from cryptography.hazmat.backends.openssl.backend import backend
+    return backend.openssl_version_text()
+
+
+# Memoizado por (segredo, salt): reconexões com o mesmo par não refazem o HKDF.
+# O cache fica só na memória do processo, onde o segredo já está.
+@functools.lru_cache(maxsize=256)
 def derive_key(shared_secret: bytes, salt: bytes) -> bytes:
-    """Deriva uma chave Fernet a partir de um segredo compartilhado."""
-    kdf = PBKDF2HMAC(
+    """Deriva uma chave AES-128 a partir de um segredo compartilhado (HKDF-SHA256).
+
+    O segredo já tem alta entropia (não é uma senha), então basta um HKDF: uma
+    passada de HMAC em vez das 100k iterações do PBKDF2.
+    """
+    kdf = HKDF(
         algorithm=hashes.SHA256(),
-        length=32,
+        length=KEY_SIZE,
         salt=salt,
-        iterations=100000,
+        info=b"rudp aes-128-gcm",
     )
-    key = base64.urlsafe_b64encode(kdf.derive(shared_secret))
-    return key
+    return kdf.derive(shared_secret)
+
+
+def _nonce(seq: int) -> bytes:
+    """Nonce GCM de 96 bits derivado do número de sequência do pacote."""
+    return seq.to_bytes(12, "big")
 
 
 class CryptoContext:
-    """Contexto de criptografia usando Fernet (AES-128-CBC)."""
+    """Contexto de criptografia usando AES-128-GCM (OpenSSL EVP, AES-NI)."""
     
     def __init__(self, key: bytes | None = None):
         """
         Inicializa o contexto.
         
         Args:
-            key: Chave Fernet (32 bytes base64-encoded). Se None, gera uma nova.
+            key: Chave AES de 16 bytes. Se None, gera uma nova.
         """
         if key is None:
-            self.key = Fernet.generate_key()
-            log.debug("Chave gerada: %s...", self.key[:16])
+            self.key = AESGCM.generate_key(bit_length=KEY_SIZE * 8)
+            log.debug("Chave gerada: %s...", self.key[:4].hex())
         else:
             self.key = key
-        self._fernet = Fernet(self.key)
+        # Contexto AEAD criado uma vez e reaproveitado em todos os pacotes
+        self._aead = AESGCM(self.key)
     
     @classmethod
     def from_shared_secret(cls, shared_secret: bytes, salt: bytes | None = None) -> "CryptoContext":
         """Cria contexto a partir de um segredo compartilhado."""
         if salt is None:
             salt = os.urandom(16)
-        key = derive_key(shared_secret, salt)
+        key = derive_key(bytes(shared_secret), bytes(salt))  # chaves do cache: bytes (hasheáveis)
         return cls(key)
     
-    def encrypt(self, data: bytes) -> bytes:
-        """Cifra dados com Fernet."""
-        return self._fernet.encrypt(data)
+    def encrypt(self, data: bytes, seq: int) -> bytes:
+        """Cifra dados com AES-GCM; o nonce é derivado de seq."""
+        return self._aead.encrypt(_nonce(seq), data, None)
     
-    def decrypt(self, data: bytes) -> bytes:
-        """Decifra dados com Fernet."""
-        return self._fernet.decrypt(data)
+    def decrypt(self, data: bytes, seq: int) -> bytes:
+        """Decifra e autentica dados com AES-GCM."""
+        return self._aead.decrypt(_nonce(seq), data, None)
     
     def get_key(self) -> bytes:
         """Retorna a chave para compartilhamento."""
@@ -63,8 +83,8 @@ class CryptoContext:
 class NoCrypto:
     """Contexto sem criptografia (passthrough)."""
     
-    def encrypt(self, data: bytes) -> bytes:
+    def encrypt(self, data: bytes, seq: int) -> bytes:
         return data
     
-    def decrypt(self, data: bytes) -> bytes:
+    def decrypt(self, data: bytes, seq: int) -> bytes:
         return data
@@ -1,26 +1,120 @@
 """Servidor RUDP com suporte a handshake, criptografia e estado de conexão."""
 from __future__ import annotations
+import asyncio
+import ctypes
+import functools
 import socket
 import logging
-from rudp.packet import Packet, PT_DATA, PT_ACK, PT_SYN, PT_SYN_ACK, PT_FIN
+import os
+import random
+import threading
+from rudp import _syscalls
+from rudp.packet import Packet, encode_packet, encode_ack, FL_NONE, PT_DATA, PT_ACK, PT_SYN, PT_SYN_ACK, PT_FIN
 from rudp.connection import Connection, ConnectionState
 from rudp.crypto import CryptoContext, NoCrypto
-from rudp.utils import should_drop
+from rudp.utils import drop_threshold, tune_socket, SOCK_BUF_SIZE
 
 log = logging.getLogger("rudp.server")
 
+# Datagramas lidos por chamada recvmmsg(2) no loop bloqueante
+RECV_BATCH = 32
+# Maior datagrama aceito (cabeçalho + payload cifrado ~1064 B cabem com folga);
+# maiores são descartados no recebimento
+MAX_PACKET = 2048
+
+# Passthrough compartilhado por todas as conexões sem criptografia
+_NOCRYPTO = NoCrypto()
+
+
+@functools.lru_cache(maxsize=4096)
+def _encode_ack(ack_num: int, rwnd: int) -> bytes:
+    """ACK codificado; depende só de (ack, wnd), então ACKs repetidos não refazem pack/CRC."""
+    return encode_ack(ack_num, rwnd)
+
+
+class _BatchedSendto:
+    """Acumula os sendto de um lote de recepção e os envia com um único sendmmsg(2).
+
+    Tem a mesma assinatura sendto(data, addr) de um socket, então os tratadores
+    não mudam; flush() envia o que estiver pendente (também chamado ao encher).
+    """
+
+    def __init__(self, sock: socket.socket, vlen: int = RECV_BATCH):
+        self.sock = sock
+        self.vlen = vlen
+        self._n = 0
+        self._msgs, self._iovs = _syscalls.alloc_msgvec(vlen)
+        self._names = [(ctypes.c_char * _syscalls.SOCKADDR_IN_SIZE)() for _ in range(vlen)]
+        for i, name in enumerate(self._names):
+            self._msgs[i].msg_hdr.msg_name = ctypes.addressof(name)
+            self._msgs[i].msg_hdr.msg_namelen = _syscalls.SOCKADDR_IN_SIZE
+        # addr -> sockaddr_in codificado (poucos peers, reaproveitado a cada ACK)
+        self._sockaddrs: dict[tuple[str, int], bytes] = {}
+
+    def sendto(self, data: bytes, addr: tuple[str, int]) -> None:
+        i = self._n
+        if i == self.vlen:
+            self.flush()
+            i = 0
+        iov = self._iovs[i]
+        iov.iov_base = data
+        iov.iov_len = len(data)
+        name = self._sockaddrs.get(addr)
+        if name is None:
+            if len(self._sockaddrs) >= 4096:
+                self._sockaddrs.clear()
+            name = self._sockaddrs[addr] = _syscalls.sockaddr_in(addr)
+        self._names[i].raw = name
+        self._n = i + 1
+
+    def flush(self) -> None:
+        """Envia os datagramas pendentes (socket bloqueante: sendmmsg pode enviar só parte)."""
+        n, self._n = self._n, 0
+        sent = 0
+        while sent < n:
+            msgs = self._msgs if sent == 0 else ctypes.pointer(self._msgs[sent])
+            sent += _syscalls.check(_syscalls.sendmmsg(self.sock.fileno(), msgs, n - sent, 0))
+
 
 class RUDPServer:
     """Servidor RUDP com gerenciamento de conexões, criptografia e 3-way handshake."""
     
-    def __init__(self, bind: str, port: int, drop_prob: float = 0.0):
+    def __init__(self, bind: str, port: int, drop_prob: float = 0.0,
+                 ready: threading.Event | None = None,
+                 sock_buf_size: int = SOCK_BUF_SIZE, reuse_port: bool = False,
+                 seed: int | None = None):
         self.bind = bind
         self.port = port
-        self.drop_prob = drop_prob
+        self.drop_prob = drop_prob  # também define _drop_thresh (ver a property)
+        # Gerador próprio da perda simulada: com seed, a sequência de descartes é
+        # reproduzível e independente de outros usos do módulo random
+        self._rand_bits = random.Random(seed).getrandbits
+        self.sock_buf_size = sock_buf_size
+        self.reuse_port = reuse_port  # SO_REUSEPORT: vários servidores na mesma porta
+        # Sinalizado assim que o socket estiver escutando
+        self.ready = ready
+        # Nível DEBUG amostrado ao abrir o socket: os log.debug por pacote ficam atrás
+        # de um teste de atributo, sem montar argumentos nem chamar o logging
+        self._dbg = log.isEnabledFor(logging.DEBUG)
         # Dicionário de conexões ativas: addr -> Connection
         self.connections: dict[tuple[str, int], Connection] = {}
-        # Dicionário de contextos de criptografia: addr -> CryptoContext
-        self.crypto_contexts: dict[tuple[str, int], CryptoContext | NoCrypto] = {}
+        # Tratadores por tipo de pacote, todos com assinatura (pkt, addr, sock)
+        self._dispatch = {
+            PT_SYN: self._handle_syn,
+            PT_ACK: self._handle_ack,
+            PT_DATA: self._handle_data,
+            PT_FIN: self._handle_fin,
+        }
+
+    @property
+    def drop_prob(self) -> float:
+        return self._drop_prob
+
+    @drop_prob.setter
+    def drop_prob(self, p: float) -> None:
+        self._drop_prob = p
+        # Perda simulada como comparação inteira: getrandbits(32) < limiar (0 = sem perda)
+        self._drop_thresh = drop_threshold(p)
 
     def _get_or_create_connection(self, addr: tuple[str, int]) -> Connection:
         """Obtém conexão existente ou cria nova."""
@@ -38,28 +132,22 @@ class RUDPServer:
         # Extrair chave de criptografia do payload (se presente)
         if pkt.payload and len(pkt.payload) > 0:
             try:
-                self.crypto_contexts[addr] = CryptoContext(pkt.payload)
+                conn.crypto = CryptoContext(pkt.payload)
                 log.info("Criptografia habilitada para %s", addr)
             except Exception as e:
                 log.warning("Erro ao criar contexto crypto: %s", e)
-                self.crypto_contexts[addr] = NoCrypto()
+                conn.crypto = _NOCRYPTO
         else:
-            self.crypto_contexts[addr] = NoCrypto()
+            conn.crypto = _NOCRYPTO
             log.debug("Sem criptografia para %s", addr)
         
         # Enviar SYN-ACK
-        syn_ack = Packet(
-            ptype=PT_SYN_ACK,
-            flags=0,
-            seq=conn.local_seq,
-            ack=pkt.seq,  # ACK do SYN recebido
-            wnd=64,
-            payload=b"",
-        )
-        sock.sendto(syn_ack.encode(), addr)
+        # Codificado direto dos campos (Struct pré-compilado), sem instanciar Packet;
+        # ack = seq do SYN recebido
+        sock.sendto(encode_packet(PT_SYN_ACK, FL_NONE, conn.local_seq, pkt.seq, 64), addr)
         log.info("SYN-ACK enviado para %s (ack=%d)", addr, pkt.seq)
 
-    def _handle_ack(self, pkt: Packet, addr: tuple[str, int]) -> None:
+    def _handle_ack(self, pkt: Packet, addr: tuple[str, int], sock: socket.socket) -> None:
         """Trata pacote ACK: pode completar handshake ou confirmar dados."""
         conn = self.connections.get(addr)
         if not conn:
@@ -72,7 +160,7 @@ class RUDPServer:
             # Inicializar expected_seq para o próximo DATA esperado
             conn.expected_seq = pkt.seq + 1
             log.info("Conexão ESTABLISHED com %s (expected_seq=%d)", addr, conn.expected_seq)
-        elif conn.state == ConnectionState.ESTABLISHED:
+        elif conn.state == ConnectionState.ESTABLISHED and self._dbg:
             log.debug("ACK recebido ack=%d de %s", pkt.ack, addr)
 
     def _handle_data(self, pkt: Packet, addr: tuple[str, int], sock: socket.socket) -> None:
@@ -86,18 +174,19 @@ class RUDPServer:
         
         # Verificar duplicata (seq < expected_seq)
         if seq < conn.expected_seq:
-            log.debug("Duplicata descartada: seq=%d (expected=%d)", seq, conn.expected_seq)
+            if self._dbg:
+                log.debug("Duplicata descartada: seq=%d (expected=%d)", seq, conn.expected_seq)
             conn.packets_dropped += 1
             # Ainda envia ACK para confirmar recebimento
-            self._send_ack(sock, addr, conn.expected_seq - 1)
+            self._send_ack(sock, addr, conn.expected_seq - 1, conn)
             return
         
         # Pacote em ordem?
         if seq == conn.expected_seq:
             # Decifrar payload
-            crypto = self.crypto_contexts.get(addr, NoCrypto())
+            crypto = conn.crypto or _NOCRYPTO
             try:
-                decrypted = crypto.decrypt(pkt.payload)
+                decrypted = crypto.decrypt(pkt.payload, seq)
             except Exception as e:
                 log.warning("Erro ao decifrar payload seq=%d: %s", seq, e)
                 decrypted = pkt.payload
@@ -106,47 +195,50 @@ class RUDPServer:
             self._deliver_packet(conn, decrypted, seq, addr)
             
             # Verificar buffer de fora de ordem para pacotes consecutivos
-            while conn.expected_seq in conn.out_of_order:
-                payload = conn.out_of_order.pop(conn.expected_seq)
-                try:
-                    decrypted = crypto.decrypt(payload)
-                except Exception:
-                    decrypted = payload
-                self._deliver_packet(conn, decrypted, conn.expected_seq, addr)
-        else:
-            # Fora de ordem: bufferizar (ainda cifrado)
-            if seq not in conn.out_of_order:
-                conn.out_of_order[seq] = pkt.payload
+            # (um teste de bit por seq: O(1) por pacote entregue, sem varrer o buffer).
+            # Caso comum, sem nada bufferizado: nem chama oo_advance (o shift de 0 é no-op)
+            if conn.oo_bits:
+                payload = conn.oo_advance()
+                while payload is not None:
+                    try:
+                        decrypted = crypto.decrypt(payload, conn.expected_seq)
+                    except Exception:
+                        decrypted = payload
+                    self._deliver_packet(conn, decrypted, conn.expected_seq, addr)
+                    payload = conn.oo_advance()
+        elif conn.oo_put(seq, pkt.payload):
+            # Fora de ordem: bufferizado (ainda cifrado)
+            if self._dbg:
                 log.debug("Fora de ordem: seq=%d bufferizado (expected=%d, buffer=%d)", 
-                         seq, conn.expected_seq, len(conn.out_of_order))
+                         seq, conn.expected_seq, conn.oo_bits.bit_count())
+        elif self._dbg:
+            log.debug("Fora de ordem: seq=%d duplicado ou além da janela (expected=%d)", 
+                     seq, conn.expected_seq)
         
         # Enviar ACK cumulativo (último em ordem)
-        self._send_ack(sock, addr, conn.expected_seq - 1)
+        self._send_ack(sock, addr, conn.expected_seq - 1, conn)
     
     def _deliver_packet(self, conn: Connection, payload: bytes, seq: int, addr: tuple = None) -> None:
         """Entrega pacote decifrado em ordem para o buffer da aplicação."""
-        conn.recv_buffer += payload
+        conn.recv_buffer.append(payload)
+        conn.recv_buffer_len += len(payload)
         conn.packets_recv += 1
         conn.bytes_recv += len(payload)
         conn.expected_seq = seq + 1
-        log.debug("Entregue seq=%d (próximo=%d, total=%d bytes)", 
-                 seq, conn.expected_seq, conn.bytes_recv)
+        if self._dbg:
+            log.debug("Entregue seq=%d (próximo=%d, total=%d bytes)", 
+                     seq, conn.expected_seq, conn.bytes_recv)
     
-    def _send_ack(self, sock: socket.socket, addr: tuple[str, int], ack_num: int) -> None:
-        """Envia ACK cumulativo com rwnd."""
-        conn = self.connections.get(addr)
+    def _send_ack(self, sock: socket.socket, addr: tuple[str, int], ack_num: int,
+                  conn: Connection | None = None) -> None:
+        """Envia ACK cumulativo com rwnd (conn: a conexão já obtida pelo chamador, se houver)."""
+        if conn is None:
+            conn = self.connections.get(addr)
         rwnd = conn.get_rwnd() if conn else 64
         
-        ack_pkt = Packet(
-            ptype=PT_ACK,
-            flags=0,
-            seq=0,
-            ack=ack_num,
-            wnd=rwnd,
-            payload=b"",
-        )
-        sock.sendto(ack_pkt.encode(), addr)
-        log.debug("ACK enviado ack=%d wnd=%d", ack_num, rwnd)
+        sock.sendto(_encode_ack(ack_num, rwnd), addr)
+        if self._dbg:
+            log.debug("ACK enviado ack=%d wnd=%d", ack_num, rwnd)
 
     def _handle_fin(self, pkt: Packet, addr: tuple[str, int], sock: socket.socket) -> None:
         """Trata pacote FIN: encerra conexão."""
@@ -158,16 +250,8 @@ class RUDPServer:
         log.info("FIN recebido de %s", addr)
         conn.state = ConnectionState.CLOSE_WAIT
         
-        # Enviar ACK do FIN
-        ack_pkt = Packet(
-            ptype=PT_ACK,
-            flags=0,
-            seq=0,
-            ack=pkt.seq,
-            wnd=0,
-            payload=b"",
-        )
-        sock.sendto(ack_pkt.encode(), addr)
+        # Enviar ACK do FIN (mesmo formato de um ACK com wnd=0)
+        sock.sendto(_encode_ack(pkt.seq, 0), addr)
         
         # Log de métricas antes de encerrar
         log.info("Conexão com %s: %d pacotes, %d bytes recebidos", 
@@ -177,33 +261,140 @@ class RUDPServer:
         del self.connections[addr]
         log.info("Conexão com %s encerrada", addr)
 
-    def run(self) -> None:
-        """Loop principal do servidor."""
+    def _open_socket(self) -> socket.socket:
+        """Cria, ajusta e associa o socket UDP do servidor."""
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        tune_socket(sock, self.sock_buf_size, self.reuse_port)
         sock.bind((self.bind, self.port))
+        self._dbg = log.isEnabledFor(logging.DEBUG)
         log.info("Servidor escutando em %s:%d", self.bind, self.port)
+        return sock
 
-        while True:
-            raw, addr = sock.recvfrom(65535)
+    def _process(self, raw: bytes | memoryview, addr: tuple[str, int], sock) -> None:
+        """Processa um datagrama recebido; sock é um socket ou transporte asyncio (sendto)."""
+        try:
+            pkt = Packet.decode(raw)
+        except Exception as e:
+            log.warning("Pacote inválido de %s: %s", addr, e)
+            return
 
-            if should_drop(self.drop_prob):
-                log.warning("Simulando perda: descartado pacote de %s", addr)
-                continue
+        # Perda simulada só sobre pacotes válidos: lixo não consome sorteio
+        thresh = self._drop_thresh
+        if thresh and self._rand_bits(32) < thresh:
+            # Perda simulada é esperada (um registro por pacote descartado): só em DEBUG
+            if self._dbg:
+                log.debug("Simulando perda: descartado pacote de %s", addr)
+            return
 
-            try:
-                pkt = Packet.decode(raw)
-            except Exception as e:
-                log.warning("Pacote inválido de %s: %s", addr, e)
+        # Dispatch por tipo de pacote: uma consulta ao dicionário
+        handler = self._dispatch.get(pkt.ptype)
+        if handler is not None:
+            handler(pkt, addr, sock)
+        else:
+            log.warning("Tipo de pacote desconhecido: %d de %s", pkt.ptype, addr)
+
+    def run(self) -> None:
+        """Loop principal do servidor."""
+        sock = self._open_socket()
+        if self.ready is not None:
+            self.ready.set()
+
+        # Linux: vários datagramas por syscall (recvmmsg), em buffers fixos de MAX_PACKET;
+        # as respostas (ACKs) de cada lote saem juntas num sendmmsg, se disponível
+        if _syscalls.recvmmsg is not None:
+            batch = _syscalls.RecvBatch(RECV_BATCH, MAX_PACKET, with_addr=True)
+            out = _BatchedSendto(sock) if _syscalls.sendmmsg is not None else sock
+            process = self._process
+            while True:
+                for raw, addr in batch.recv_from(sock):
+                    if raw is None:
+                        log.warning("Datagrama maior que %d bytes descartado de %s", MAX_PACKET, addr)
+                        continue
+                    process(raw, addr, out)
+                if out is not sock:
+                    out.flush()
+
+        # Buffer de recepção reutilizado: sem alocar um bytes por datagrama.
+        # Packet.decode copia o payload, então a fatia só precisa valer até _process retornar.
+        # Com MSG_TRUNC (Linux) o retorno é o tamanho real, e um datagrama truncado é
+        # detectado; sem ele, o truncado falha na validação de tamanho do decode.
+        buf = bytearray(MAX_PACKET)
+        mv = memoryview(buf)
+        recv_into = sock.recvfrom_into
+        trunc = getattr(socket, "MSG_TRUNC", 0)
+        while True:
+            nbytes, addr = recv_into(buf, 0, trunc)
+            if nbytes > MAX_PACKET:
+                log.warning("Datagrama maior que %d bytes descartado de %s", MAX_PACKET, addr)
                 continue
+            self._process(mv[:nbytes], addr, sock)
+
+    async def run_asyncio(self, loop: asyncio.AbstractEventLoop | None = None) -> asyncio.DatagramTransport:
+        """Registra o servidor como endpoint de datagramas em um event loop.
+
+        Vários servidores podem compartilhar o mesmo loop (e a mesma thread).
+        Retorna o transporte; feche-o para encerrar o servidor.
+        """
+        loop = loop or asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ServerProtocol(self), sock=self._open_socket()
+        )
+        if self.ready is not None:
+            self.ready.set()
+        return transport
+
+
+class _ServerProtocol(asyncio.DatagramProtocol):
+    """Adapta um RUDPServer à API de datagramas do asyncio."""
+
+    def __init__(self, server: RUDPServer):
+        self.server = server
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        # DatagramTransport.sendto(data, addr) tem a mesma assinatura de socket.sendto
+        self.server._process(data, addr, self.transport)
+
+
+def run_workers(bind: str, port: int, workers: int, drop_prob: float = 0.0,
+                sock_buf_size: int = SOCK_BUF_SIZE, seed: int | None = None) -> None:
+    """Roda `workers` processos do servidor na mesma porta via SO_REUSEPORT (Linux/BSD).
+
+    O kernel distribui os datagramas por fluxo (hash da 4-tupla), então cada cliente
+    cai sempre no mesmo processo e o estado das conexões não é compartilhado.
+    Cada processo é fixado em uma CPU (sched_setaffinity), quando disponível; para
+    casar com as filas RX da NIC, restrinja as CPUs do processo pai (ex.: taskset).
+    Com seed, o worker i usa seed + i na perda simulada.
+    Não retorna (cada processo fica no loop do servidor).
+    """
+    if workers > 1 and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+        log.warning("fork/SO_REUSEPORT indisponível: usando um único processo")
+        workers = 1
+    if workers <= 1:
+        RUDPServer(bind, port, drop_prob, sock_buf_size=sock_buf_size, seed=seed).run()
+        return
+
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    worker = 0
+    for i in range(1, workers):
+        if os.fork() == 0:
+            worker = i
+            break
 
-            # Dispatch por tipo de pacote
-            if pkt.ptype == PT_SYN:
-                self._handle_syn(pkt, addr, sock)
-            elif pkt.ptype == PT_ACK:
-                self._handle_ack(pkt, addr)
-            elif pkt.ptype == PT_DATA:
-                self._handle_data(pkt, addr, sock)
-            elif pkt.ptype == PT_FIN:
-                self._handle_fin(pkt, addr, sock)
-            else:
-                log.warning("Tipo de pacote desconhecido: %d de %s", pkt.ptype, addr)
+    if cpus:
+        cpu = cpus[worker % len(cpus)]
+        os.sched_setaffinity(0, {cpu})
+        log.info("Worker %d (pid %d) fixado na CPU %d", worker, os.getpid(), cpu)
+    server = RUDPServer(bind, port, drop_prob, sock_buf_size=sock_buf_size, reuse_port=True,
+                        seed=None if seed is None else seed + worker)
+    if worker == 0:
+        server.run()
+        return
+    try:
+        server.run()
+    finally:
+        # Filho: não volta para o código do chamador (nem roda seus handlers de saída)
+        os._exit(0)
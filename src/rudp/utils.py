@@ -1,9 +1,16 @@
 from __future__ import annotations
+import socket
 import time
 import random
 
+# Buffers de socket (SO_SNDBUF/SO_RCVBUF) para absorver rajadas da janela
+SOCK_BUF_SIZE = 4 * 1024 * 1024
+# Cliente: buffers maiores para janelas de retransmissão em rajada
+CLIENT_SOCK_BUF_SIZE = 12 * 1024 * 1024
+
 def now_ms() -> int:
-    return int(time.time() * 1000)
+    """Relógio monotônico em ms (para medir intervalos, não para datas)."""
+    return time.monotonic_ns() // 1_000_000
 
 def should_drop(p: float) -> bool:
     """Retorna True se deve descartar (simular perda). p entre 0 e 1."""
@@ -12,3 +19,28 @@ def should_drop(p: float) -> bool:
     if p >= 1:
         return True
     return random.random() < p
+
+def drop_threshold(p: float) -> int:
+    """Limiar inteiro equivalente a should_drop(p): descarta se getrandbits(32) < limiar.
+
+    0 desliga a perda (o chamador nem sorteia); 1 << 32 descarta tudo.
+    """
+    if p <= 0:
+        return 0
+    if p >= 1:
+        return 1 << 32
+    return int(p * (1 << 32))
+
+def tune_socket(sock: socket.socket, buf_size: int = SOCK_BUF_SIZE, reuse_port: bool = False,
+                dont_fragment: bool = False) -> None:
+    """Ajusta SO_SNDBUF/SO_RCVBUF e, se pedido e suportado, SO_REUSEPORT (Linux/BSD)
+    e IP_MTU_DISCOVER=IP_PMTUDISC_DO (Linux: DF ligado, o IP nunca fragmenta).
+
+    O kernel limita os buffers a net.core.{w,r}mem_max.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buf_size)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buf_size)
+    if reuse_port and hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    if dont_fragment and hasattr(socket, "IP_MTU_DISCOVER"):
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MTU_DISCOVER, socket.IP_PMTUDISC_DO)
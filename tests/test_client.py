@@ -0,0 +1,59 @@
+"""Testes do cliente RUDP contra um servidor local em thread."""
+from __future__ import annotations
+import socket
+import threading
+import unittest
+
+from rudp.client import RUDPClient
+from rudp.packet import PAYLOAD_SIZE
+from rudp.server import RUDPServer
+
+
+class _MutedAckServer(RUDPServer):
+    """Servidor que, com mute_acks ligado, recebe os dados mas não envia os ACKs."""
+    
+    mute_acks = False
+    
+    def _send_ack(self, sock, addr, ack_num, conn=None) -> None:
+        if not self.mute_acks:
+            super()._send_ack(sock, addr, ack_num, conn)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AbortedTransferTest(unittest.TestCase):
+    
+    def test_next_transfer_after_abort_with_packets_in_flight(self):
+        port = _free_port()
+        ready = threading.Event()
+        server = _MutedAckServer("127.0.0.1", port, ready=ready)
+        threading.Thread(target=server.run, daemon=True).start()
+        self.assertTrue(ready.wait(5))
+        
+        client = RUDPClient("127.0.0.1", port, timeout_s=0.05, cc_enabled=False)
+        self.assertTrue(client.connect())
+        conn = server.connections[client.sock.getsockname()]
+        
+        # Primeira transferência: o servidor recebe todos os chunks, mas os ACKs se
+        # perdem; o cliente aborta com a janela inteira em voo
+        first = b"A" * (20 * PAYLOAD_SIZE)
+        server.mute_acks = True
+        stats = client.send_data(first)
+        server.mute_acks = False
+        self.assertEqual(stats.packets_sent, 0)
+        self.assertEqual(conn.read_all(), first)
+        
+        # A próxima transferência não pode reutilizar os seqs já vistos pelo servidor
+        second = bytes(range(256)) * 80  # 20480 bytes
+        stats = client.send_data(second)
+        self.assertEqual(stats.bytes_sent, len(second))
+        self.assertEqual(conn.read_all(), second)
+        client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Testes do buffer de fora de ordem da Connection."""
+from __future__ import annotations
+import unittest
+
+from rudp.connection import Connection
+
+
+class OutOfOrderBufferTest(unittest.TestCase):
+    
+    def test_ring_allocated_on_first_out_of_order_put(self):
+        conn = Connection(remote_addr=("127.0.0.1", 9000))
+        conn.expected_seq = 10
+        self.assertIsNone(conn.oo_ring)
+        
+        self.assertTrue(conn.oo_put(12, b"c"))
+        self.assertTrue(conn.oo_put(11, b"b"))
+        self.assertFalse(conn.oo_put(12, b"c"))  # duplicata
+        self.assertFalse(conn.oo_put(10 + conn.max_reorder, b"x"))  # além da janela
+        self.assertEqual(len(conn.oo_ring), conn.max_reorder)
+        
+        # Entrega de expected_seq=10 em ordem, seguida do que estava bufferizado
+        delivered = []
+        conn.expected_seq += 1
+        while (payload := conn.oo_advance()) is not None:
+            delivered.append(payload)
+            conn.expected_seq += 1
+        self.assertEqual(delivered, [b"b", b"c"])
+        self.assertEqual(conn.oo_bits, 0)
+        self.assertEqual(conn.expected_seq, 13)
+
+
+if __name__ == "__main__":
+    unittest.main()